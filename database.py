@@ -1,10 +1,16 @@
 import pymongo
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import subprocess
+import re
 import threading
+import queue
+import concurrent.futures
 import datetime
 import time
+import atexit
+import importlib.util
 import os
 
 
@@ -13,7 +19,8 @@ class Database:
     Loads the data from MongoDB. Gathers and stores new ones. Sorts them, searches in them, exports them as different
     file types or as a mongodump, import an external mongodump.
     The data is saved as a pandas.DataFrame.
-    The data itself doesn't change in the database, a copy is saved in self.matches to be processed.
+    The data itself doesn't change in the database, self.matches holds the processed (searched/sorted) rows.
+    self.matches is never modified in place, so when nothing is filtered it is self.data itself, not a copy.
     Apart from the data, some metadata about the gather session is also saved.
     Default encoding: utf-8"""
     
@@ -21,6 +28,46 @@ class Database:
     date_format = "%d-%b-%Y"
     conn_path = "mongodb://127.0.0.1:27017"
 
+    # One MongoClient shared by every instance and thread, created on first use by Database.get_client()
+    client = None
+    client_lock = threading.Lock()
+
+    # Engine used for parquet exports. Optional dependency, None when neither pyarrow nor fastparquet is installed
+    parquet_engine = next((engine for engine in ("pyarrow", "fastparquet") if importlib.util.find_spec(engine)), None)
+
+    # Number of threads scanning directories in gather_data (self.scan_tree())
+    scan_workers = min(32, (os.cpu_count() or 1) * 4)
+
+    # Documents per insert_many in store_data. Keeps the prepared rows bounded for very large gathers
+    insert_batch_size = 50_000
+    # Number of threads sending batches in store_data. Inserting is I/O bound, pymongo releases the GIL while waiting
+    insert_workers = 8
+    # The data is rewritten completely on every gather, so per batch journal acknowledgement is not needed
+    data_write_concern = pymongo.WriteConcern(w=1, j=False)
+
+    # Byte units as (power of 2, suffix), largest first. Used by format_bytes
+    byte_units = ((40, "TB"), (30, "GB"), (20, "MB"), (10, "KB"))
+
+    # Byte suffixes accepted in searches as (suffix, multiplier). Longer suffixes first, so "kb" is not read as "b"
+    byte_suffixes = (
+        ("kb", 1 << 10),
+        ("mb", 1 << 20),
+        ("gb", 1 << 30),
+        ("tb", 1 << 40),
+        ("bytes", 1),
+        ("byte", 1),
+        ("b", 1)
+    )
+
+    # Size search operators, mapped to the NumPy comparison run over the whole bytes column
+    size_operators = {
+        ">=": np.greater_equal,
+        "<=": np.less_equal,
+        ">": np.greater,
+        "<": np.less
+    }
+    size_operator_pattern = re.compile(r"^(>=|<=|>|<)")
+
 
     def __init__(self) -> None:
 
@@ -34,35 +81,48 @@ class Database:
         }
 
         # Data
-        self.data = pd.DataFrame({"path": [], "bytes": [], "size": []}) # self.data is stored and only accessed
-        self.matches = self.data.copy() # self.matches is the one being processed (sorted, searched)
+        self.data = self.create_dataframe([], []) # self.data is stored and only accessed
+        self.matches = self.data # self.matches is the one being processed (sorted, searched)
 
         # Data related attributes
         self.total_size = ""
         self.matches_bytes = 0
         self.sorted = None
+        self.filtered = False # True while self.matches holds the results of a (non empty) search
+        # Caches derived from self.data. Cleared by self.clear_cache() whenever self.data is replaced
+        self.paths_lower = None # Lowercase paths, computed on the first case insensitive search
+        self.sort_orders = {} # Ascending sort order of self.data per attribute, computed on the first sort
+        self.last_search = None # (query, matches, matches_bytes) of the last non empty search
+
+
+    @classmethod
+    def get_client(cls) -> pymongo.MongoClient:
+        """Returns the shared MongoClient, creating it on the first call.
+        The client keeps a pool of connections, so the handshake is done once and not on every store/load.
+        It is closed when the program exits."""
+
+        with cls.client_lock:
+            if cls.client is None:
+                cls.client = pymongo.MongoClient(cls.conn_path)
+                atexit.register(cls.client.close)
+        return cls.client
 
 
     def store_data(self) -> None:
         """Stores metadata and data to a MongoDB database.
         The full path is saved in the database. And it is shortened when loaded into memory.
-        Opens and closes the connection at the end.
         This method is calle in a thread. When it finishes, it prints to stdout to avoid errors."""
 
-        # Data preparation
-        data_rows = []
-        for i in range(self.metadata["total_files"]):
-            data_rows.append({
-                "path": self.data.iloc[i]["path"].replace("~", self.metadata["location"]),
-                "bytes": int(self.data.iloc[i]["bytes"]) # np.int64 cannot be encoded by mongodb, so cast it to int
-                })
+        # The columns are read once as arrays. tolist() gives python ints, np.int64 cannot be encoded by mongodb
+        location = self.metadata["location"]
+        paths = self.data["path"].to_numpy()
+        bytesizes = self.data["bytes"].to_numpy().tolist()
         
-        # Opening a connection to save the metadata/data
-        conn = pymongo.MongoClient(self.conn_path)
-        mydb = conn["fsv"]
+        # Saving the metadata/data through the shared client
+        mydb = self.get_client()["fsv"]
 
         metadata_col = mydb["metadata"]
-        data_col = mydb["data"]
+        data_col = mydb.get_collection("data", write_concern=self.data_write_concern)
         
         # Delete old and insert new metadata/data
         # Metadata isn't updated because this way errors can be avoided with future changes
@@ -70,28 +130,34 @@ class Database:
         data_col.delete_many({})
 
         metadata_col.insert_one(self.metadata)
-        data_col.insert_many(data_rows)
 
-        conn.close()
+        def insert_batch(start: int) -> None:
+            """Unordered bulk insert of the rows from @start. The rows are prepared right before they are sent."""
+            stop = start + self.insert_batch_size
+            data_rows = [{"path": location + path[1:], "bytes": bytesize} # Only the leading "~" is expanded
+                         for path, bytesize in zip(paths[start:stop], bytesizes[start:stop])]
+            data_col.insert_many(data_rows, ordered=False, bypass_document_validation=True)
+
+        # The batches are inserted concurrently through the client's connection pool
+        # list() consumes the results, so an exception in any batch is raised here
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.insert_workers) as executor:
+            list(executor.map(insert_batch, range(0, len(paths), self.insert_batch_size)))
+
         print("Thread closed. Data stored successfully!")
 
 
     def load_data(self) -> None:
         """Parses metadata and data from a MongoDB database.
-        The path is shortened when parsed. self.metadata["location"] is replaced by "~".
-        Opens and closes the connection at the end."""
+        The path is shortened when parsed. self.metadata["location"] is replaced by "~"."""
 
-        # Opening mongodb connection, reading data and closing it
-        conn = pymongo.MongoClient(self.conn_path)
-        mydb = conn["fsv"]
+        # Reading the metadata/data through the shared client
+        mydb = self.get_client()["fsv"]
 
         metadata_col = mydb["metadata"]
         data_col = mydb["data"]
 
         metadata = metadata_col.find_one({},{"_id": 0})
-        data = data_col.find({},{"_id": 0})
-        
-        conn.close()
+        data = list(data_col.find({},{"_id": 0}))
 
         # Metadata/Data parsing
         try:
@@ -101,18 +167,18 @@ class Database:
             self.metadata["total_files"] = metadata["total_files"]
             self.metadata["total_bytes"] = metadata["total_bytes"]
 
-            _data_dict = {"path": [], "bytes": [], "size": []}
-
-            for row in data:
-                filepath = row["path"].replace(self.metadata["location"], "~")
-                bytesize = row["bytes"]
-
-                _data_dict["path"].append(filepath)
-                _data_dict["bytes"].append(bytesize)
-                _data_dict["size"].append(self.format_bytes(bytesize))
-
-            self.matches = pd.DataFrame(_data_dict)
-            self.data = self.matches.copy()
+            # Only the location prefix is replaced by "~", while the rows are read
+            # Paths that don't start with it (e.g. an imported mongodump) are kept as they are
+            # The sizes are written straight into the int64 column, without a list of python ints in between
+            location = self.metadata["location"]
+            prefix_length = len(location)
+            self.data = self.create_dataframe(
+                ["~" + path[prefix_length:] if path.startswith(location) else path
+                 for path in (row["path"] for row in data)],
+                (row["bytes"] for row in data))
+            self.matches = self.data # Nothing is filtered yet
+            self.filtered = False
+            self.clear_cache()
         except TypeError:
             # Raised when the database is empty
             return False
@@ -122,7 +188,7 @@ class Database:
 
     def gather_data(self, dirpath: str) -> None:
         """Walks the path given to the end, gathers and stores new data in a temporary dictionary.
-        When the process ends, converts and saves the data as a DataFrame (Both self.data and self.matches)
+        When the process ends, converts and saves the data as a DataFrame (self.data, self.matches refers to it)
         Gathers new metadata and calls self.store_data().
         Ignores FileNotFoundError and PermissionError."""
 
@@ -133,33 +199,30 @@ class Database:
             return f"{s} s" if not m else f"{int(m)}m {s}s"
         
         self.sorted = None
-        self.metadata["total_bytes"] = 0
 
-        _data_dict = {"path": [], "bytes": [], "size": []}
+        _data_dict = {"path": [], "bytes": []}
 
         # Gather new data
+        # Every filepath starts with dirpath, so it's shortened by slicing the prefix off, instead of replacing
+        # (which scans the whole path and would also replace a repeated dirpath further in the path)
+        prefix_length = len(dirpath)
         ti = time.perf_counter()
-        for path, dirs, files in os.walk(dirpath):
-            for file in files:
-                try:
-                    filepath = os.path.join(path, file)
-                    bytesize = os.path.getsize(filepath)
-                    self.metadata["total_bytes"] += bytesize
-                    _data_dict["path"].append(filepath.replace(dirpath, "~"))
-                    _data_dict["bytes"].append(bytesize)
-                    _data_dict["size"].append(self.format_bytes(bytesize))
-                except FileNotFoundError:
-                    continue
-                except PermissionError:
-                    continue
+        for files in self.scan_tree(dirpath):
+            for filepath, bytesize in files:
+                _data_dict["path"].append("~" + filepath[prefix_length:])
+                _data_dict["bytes"].append(bytesize)
 
-        self.matches = pd.DataFrame(_data_dict)
-        self.data = self.matches.copy()
+        self.data = self.create_dataframe(_data_dict["path"], _data_dict["bytes"])
+        self.matches = self.data # Nothing is filtered yet
+        self.filtered = False
+        self.clear_cache()
 
 
         final_time = round(time.perf_counter() - ti, 2)
         
         # Gather metadata
+        # The total is a single NumPy reduction over the bytes column, instead of a running sum per file
+        self.metadata["total_bytes"] = int(self.data["bytes"].to_numpy().sum())
         self.matches_bytes = self.metadata["total_bytes"]
         self.metadata["location"] = dirpath
         self.metadata["date"] = datetime.datetime.now().strftime(self.date_format)
@@ -172,109 +235,262 @@ class Database:
         print("Opening thread. Storing data to MongoDB. Do not interrupt...")
 
 
+    @staticmethod
+    def scan_directory(dirpath: str) -> tuple:
+        """Scans a single directory (not recursive). Returns (files, subdirectories).
+        files is a list of (filepath, bytes) and subdirectories a list of paths to be scanned next.
+        os.scandir is used instead of os.walk + os.path.getsize, the DirEntry objects already hold the file type,
+        so only one stat call per file is needed. Symlinks are not followed.
+        On POSIX the directory is scanned through a file descriptor (like os.fwalk), so each stat is done relative
+        to the open directory, instead of resolving the whole path again.
+        Entries that raise an OSError (removed, no permission, I/O errors) are skipped one by one.
+        Directories that cannot be listed are skipped (like os.walk)."""
+
+        files = []
+        subdirectories = []
+        prefix = dirpath if dirpath.endswith(os.sep) else dirpath + os.sep
+
+        fd = None
+        try:
+            if os.scandir in os.supports_fd:
+                fd = os.open(dirpath, os.O_RDONLY | os.O_DIRECTORY)
+
+            with os.scandir(dirpath if fd is None else fd) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(prefix + entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append((prefix + entry.name, entry.stat(follow_symlinks=False).st_size))
+                    except OSError:
+                        # Only this entry is skipped (removed, no permission, I/O error...)
+                        continue
+        except OSError:
+            # The directory itself cannot be opened/listed
+            pass
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+        return files, subdirectories
+
+
+    def scan_tree(self, dirpath: str) -> list:
+        """Scans @dirpath recursively using a pool of self.scan_workers threads.
+        Returns a list with the files of every directory scanned (see self.scan_directory()).
+        Scanning is bound by syscalls, which release the GIL, so the threads overlap them.
+        The directories to be scanned are shared through a queue, each thread keeps its' own results,
+        which are joined at the end, so no locking is needed on the results.
+        The threads finish in any order, so the results are put back in top-down order (like os.walk),
+        this way the data has the same order on every gather."""
+
+        directories = queue.Queue()
+        directories.put(dirpath)
+        results = {}
+        errors = []
+
+        def worker() -> None:
+            """Scans directories until a None is received. Found subdirectories are queued before the
+            directory is marked as done, so the queue can't be empty while there is still work to do.
+            A directory is always marked as done, even on an unexpected error, otherwise join() would block forever.
+            The error is kept and raised by the calling thread, once every worker has finished."""
+            scanned = {}
+            while True:
+                directory = directories.get()
+                if directory is None:
+                    break
+                try:
+                    files, subdirectories = self.scan_directory(directory)
+                    for subdirectory in subdirectories:
+                        directories.put(subdirectory)
+                    scanned[directory] = (files, subdirectories)
+                except Exception as error:
+                    errors.append(error)
+                finally:
+                    directories.task_done()
+            results.update(scanned)
+
+        workers = [threading.Thread(target=worker) for _ in range(self.scan_workers)]
+        for thread in workers:
+            thread.start()
+
+        directories.join()
+        for thread in workers:
+            directories.put(None)
+        for thread in workers:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+        # Each directory's files, then its subdirectories in the order they were listed
+        ordered = []
+        pending = [dirpath]
+        while pending:
+            files, subdirectories = results.pop(pending.pop())
+            ordered.append(files)
+            pending.extend(reversed(subdirectories))
+
+        return ordered
+
+
+    @staticmethod
+    def create_dataframe(paths: list, bytesizes) -> pd.DataFrame:
+        """Creates the data DataFrame column by column.
+        The bytes column is built directly as a contiguous int64 array, so no dtype inference or boxing is done
+        by pandas, and the column can be processed with NumPy (searching, sorting, plotting) without conversions.
+        @bytesizes can be any iterable (e.g. a generator) with one value per path, no intermediate list is needed.
+        The human readable size isn't stored. It's formatted only when needed, see self.add_size_column()."""
+        return pd.DataFrame({
+            "path": np.array(paths, dtype=object),
+            "bytes": np.fromiter(bytesizes, dtype=np.int64, count=len(paths))
+        })
+
+
+    def add_size_column(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Returns a copy of @df with the human readable "size" column added.
+        Used by the exports, so that sizes are only formatted for the rows actually written."""
+        return df.assign(size=self.format_bytes_array(df["bytes"].to_numpy()))
+
+
     @staticmethod
     def format_bytes(bytes: int) -> str:
-        """Converts bytes to a readable string format."""
-        
-        TB = 1_099_511_627_776
-        GB = 1_073_741_824
-        MB = 1_048_576
-        KB = 1_024
+        """Converts bytes to a readable string format.
+        The unit is picked from the bit length of bytes (2^10 per unit), so only one division is done."""
         
-        if bytes / TB >= 1:
-            return f"{round(bytes / TB, 3):.3f} TB"
-        elif bytes / GB >= 1:
-            return f"{round(bytes / GB, 3):.3f} GB"
-        elif bytes / MB >= 1:
-            return f"{round(bytes / MB, 3):.3f} MB"
-        elif bytes / KB >= 1:
-            return f"{round(bytes / KB, 3):.3f} KB"
-        
-        return f"{bytes} Bytes"
+        if bytes < 1_024:
+            return f"{bytes} Bytes"
+
+        exponent = int(bytes).bit_length() - 1
+        for shift, unit in Database.byte_units:
+            if exponent >= shift:
+                return f"{bytes / (1 << shift):.3f} {unit}"
+
+
+    @staticmethod
+    def format_bytes_array(bytesizes: np.ndarray) -> np.ndarray:
+        """Vectorized self.format_bytes(). Converts an array of bytes to an array of readable strings.
+        The unit of every element is found with one np.searchsorted over the unit thresholds, and the scaling is
+        done in one NumPy division. Only the final string formatting is done per distinct size, since file sizes
+        repeat a lot (empty files, small config files etc.), and the strings are then mapped back to every element.
+        Used whenever a whole column of sizes is needed."""
+
+        bytesizes, inverse = np.unique(np.asarray(bytesizes, dtype=np.int64), return_inverse=True)
+
+        shifts = np.array([0] + [shift for shift, _ in reversed(Database.byte_units)], dtype=np.int64)
+        formats = np.array(["%d Bytes"] + [f"%.3f {unit}" for _, unit in reversed(Database.byte_units)], dtype=object)
+
+        unit_index = np.searchsorted(np.left_shift(1, shifts[1:]), bytesizes, side="right")
+        scaled = bytesizes / np.left_shift(1, shifts)[unit_index]
+
+        formatted = np.array([fmt % value for fmt, value in zip(formats[unit_index].tolist(), scaled.tolist())],
+                            dtype=object)
+        return formatted[inverse]
 
 
     @staticmethod
     def parse_bytes(text: str) -> int:
         """Parses and converts byte strings into bytes. Returns bytes as integers.
-        This function is used to covert human readable bytes from the search bar, into bytes."""
-        
-        TB = 1_099_511_627_776
-        GB = 1_073_741_824
-        MB = 1_048_576
-        KB = 1_024
+        This function is used to covert human readable bytes from the search bar, into bytes.
+        The suffix is matched in a single pass over self.byte_suffixes. Returns None if there is no known suffix."""
         
         text = text.lower().replace(" ", "")
-        if text.endswith("kb"):
-            return int(float(text[:-2]) * KB)
-        elif text.endswith("mb"):
-            return int(float(text[:-2]) * MB)
-        elif text.endswith("gb"):
-            return int(float(text[:-2]) * GB)
-        elif text.endswith("tb"):
-            return int(float(text[:-2]) * TB)
-        elif text.endswith("b") or "byte" in text:
-            return int(text.replace("b", "").replace("yte", "").replace("s", ""))
+        for suffix, multiplier in Database.byte_suffixes:
+            if text.endswith(suffix):
+                return int(float(text[:-len(suffix)]) * multiplier)
+
+
+    def clear_cache(self) -> None:
+        """Clears every cache derived from self.data. Called whenever self.data is replaced (gather_data/load_data)."""
+        self.paths_lower = None
+        self.sort_orders = {}
+        self.last_search = None
+
+
+    def get_paths_lower(self) -> pd.Series:
+        """Returns the lowercase paths of self.data, used by case insensitive searches.
+        They are computed once per data set and cached, instead of lowering every path on every search."""
+        if self.paths_lower is None:
+            self.paths_lower = self.data["path"].str.lower()
+        return self.paths_lower
+
+
+    def build_mask(self, key: str) -> np.ndarray:
+        """Returns the boolean mask of the rows of self.data that match a single search @key."""
+
+        # Filtered size search. The operator is matched once, and the size is parsed once per key
+        size_operator = self.size_operator_pattern.match(key)
+        if size_operator:
+            operator = size_operator.group()
+            size_filter = self.parse_bytes(key[size_operator.end():])
+            bytesizes = self.data["bytes"].to_numpy()
+            if size_filter is None:
+                # Unparsable sizes match nothing
+                return np.zeros(bytesizes.shape[0], dtype=bool)
+            return self.size_operators[operator](bytesizes, size_filter)
+
+        # Name keys are plain substrings (regex=False). This skips the regex compilation and engine on every path,
+        # and keys containing characters such as "(", "+" or "[" are matched literally
+        paths = self.data["path"]
+
+        # RegEx name search
+        if key.startswith("^"):
+            mask = paths.str.startswith(key[1:])
+        elif key.endswith("$"):
+            mask = paths.str.endswith(key[:-1])
+        
+        # Case insensitive search
+        elif key.startswith("%") and key.endswith("%"):
+            mask = self.get_paths_lower().str.contains(key[1:-1].lower(), regex=False)
+        
+        # Not in name search
+        elif key.startswith("!"):
+            mask = ~paths.str.contains(key[1:], regex=False)
+                    
+        # Full search
+        else:
+            mask = paths.str.contains(key, regex=False)
+
+        return mask.to_numpy(dtype=bool)
 
 
     def search(self, query: str) -> None:
         """Performs linear search, updates self.matches and self.matches_bytes.
-        query is broken down to its' keys (if there are multiple)."""
+        query is broken down to its' keys (if there are multiple).
+        Every key produces a boolean mask over self.data, and the masks are combined,
+        so self.matches is only built once, at the end."""
         self.sorted = None
-        self.matches = self.data.copy()
-        self.matches_bytes = self.metadata["total_bytes"]
+        self.filtered = bool(query)
         
         if not query:
+            # No filtering, self.data is shared instead of copied
+            self.matches = self.data
+            self.matches_bytes = self.metadata["total_bytes"]
+            return
+
+        # Searching the same query again (e.g. pressing Enter twice) reuses the last results
+        if self.last_search and self.last_search[0] == query:
+            _, self.matches, self.matches_bytes = self.last_search
             return
 
         queries = query.split(" && ")
 
-        for key in queries:
-            
-            # Filtered size search
-            if key.startswith(">"):
-                if key.startswith(">="):
-                    size_filter = self.parse_bytes(key[2:])
-                    self.matches = self.matches.loc[self.matches["bytes"] >= size_filter]
-                else:
-                    size_filter = self.parse_bytes(key[1:])
-                    self.matches = self.matches.loc[self.matches["bytes"] > size_filter]
-            elif key.startswith("<"):
-                if key.startswith("<="):
-                    size_filter = self.parse_bytes(key[2:])
-                    self.matches = self.matches.loc[self.matches["bytes"] <= size_filter]
-                else:
-                    size_filter = self.parse_bytes(key[1:])
-                    self.matches = self.matches.loc[self.matches["bytes"] < size_filter]
-            
-            # RegEx name search
-            elif key.startswith("^"):
-                key = key[1:]
-                self.matches = self.matches.loc[self.matches["path"].str.startswith(key)]
-            elif key.endswith("$"):
-                key = key[:-1]
-                self.matches = self.matches.loc[self.matches["path"].str.endswith(key)]
-            
-            # Case insensitive search
-            elif key.startswith("%") and key.endswith("%"):
-                key = key[1:-2]
-                self.matches = self.matches.loc[self.matches["path"].str.contains(key, case=False)]
-            
-            # Not in name search
-            elif key.startswith("!"):
-                key = key[1:]
-                self.matches = self.matches.loc[~self.matches["path"].str.contains(key)]
-                        
-            # Full search
-            else:
-                self.matches = self.matches.loc[self.matches["path"].str.contains(key)]
+        mask = self.build_mask(queries[0])
+        for key in queries[1:]:
+            # Not in place, a mask from a path key can be a read only view of pandas data (Copy-on-Write)
+            mask = mask & self.build_mask(key)
 
-        # Calculate the size of matches in bytes
-        self.matches_bytes = self.matches["bytes"].sum()
+        self.matches = self.data.loc[mask]
+
+        # Calculate the size of matches in bytes. A single NumPy reduction, cast to int so it can be formatted
+        self.matches_bytes = int(self.data["bytes"].to_numpy()[mask].sum())
+
+        self.last_search = (query, self.matches, self.matches_bytes)
 
 
     def export_as(self, kind: str) -> None:
         """Exports the data as @kind.
-        @kind: database/excel/csv/json/html/text"""
+        @kind: database/excel/parquet/csv/json/html/text"""
 
         if not os.path.exists("Exports"):
             os.mkdir("Exports")
@@ -292,26 +508,31 @@ class Database:
         elif kind == "excel":
             export_path += ".xlsx"
 
-            df = self.data.copy()
+            df = self.add_size_column(self.data)
             df.columns = [f"Path (~ = {self.metadata['location']})", "Bytes", "Size"]
             df.to_excel(export_path, 
                         sheet_name=f"{os.path.basename(self.metadata['location'])} - {self.metadata['date']}",
                         index=False)
         
+        elif kind == "parquet":
+            # Binary, columnar and compressed. Much faster to write and read back than the text formats
+            export_path += ".parquet"
+            self.add_size_column(self.matches).to_parquet(export_path, engine=self.parquet_engine, index=False)
+
         elif kind == "csv":
             export_path += ".csv"
             
             with open(export_path, "w", encoding=self.encoding, newline="") as fp:
                 fp.write(";".join([str(value) for value in self.metadata.values()]) + "\n")
-            self.matches.to_csv(export_path, mode="a", sep=";", index=False, header=False)
+            self.add_size_column(self.matches).to_csv(export_path, mode="a", sep=";", index=False, header=False)
         
         elif kind == "json":
             export_path += ".json"
-            self.matches.to_json(export_path, indent=4)
+            self.add_size_column(self.matches).to_json(export_path, indent=4)
 
         elif kind == "html":
             export_path += ".html"
-            self.matches.to_html(export_path)
+            self.add_size_column(self.matches).to_html(export_path)
 
         elif kind == "text":
             export_path += ".txt"
@@ -321,8 +542,8 @@ class Database:
                 fp.write(f"Process time: {self.metadata['time']}\n")
                 fp.write(f"Total files: {self.metadata['total_files']}\n")
                 fp.write(f"Total size: {self.total_size}\n\n")
-                for i in range(self.metadata["total_files"]):
-                    fp.write(f"""{self.data.iloc[i]["size"]}{" " * 8}{self.data.iloc[i]["path"]}\n""")
+                sizes = self.format_bytes_array(self.data["bytes"].to_numpy())
+                fp.writelines(f"{size}{' ' * 8}{path}\n" for size, path in zip(sizes, self.data["path"].to_numpy()))
 
 
     def import_data(self, dirpath: str) -> bool:
@@ -334,24 +555,41 @@ class Database:
         return successful
 
 
-    def sort_by(self, attr: str) -> None:
-        """Sorts matches by @attr. If matches aren't sorted, sorts ascending first, otherwise descending."""
+    @staticmethod
+    def sort_order(df: pd.DataFrame, attr: str) -> np.ndarray:
+        """Returns the positions of @df's rows sorted ascending by @attr (size/name).
+        Sorting is done with np.lexsort over the raw columns (the last key is the primary one)."""
+
+        paths = df["path"].to_numpy()
+        bytesizes = df["bytes"].to_numpy()
 
         if attr == "size":
-            if self.sorted == "size/asc":
-                self.matches.sort_values(by=["bytes", "path"], ascending=[False, False], inplace=True)
-                self.sorted = "size/desc"
-            else:
-                self.matches.sort_values(by=["bytes", "path"], ascending=[True, True], inplace=True)
-                self.sorted = "size/asc"
-        
-        elif attr == "name":
-            if self.sorted == "name/asc":
-                self.matches.sort_values(by=["path", "bytes"], ascending=[False, False], inplace=True)
-                self.sorted = "name/desc"
-            else:
-                self.matches.sort_values(by=["path", "bytes"], ascending=[True, True], inplace=True)
-                self.sorted = "name/asc"
+            return np.lexsort((paths, bytesizes))
+        return np.lexsort((bytesizes, paths))
+
+
+    def sort_by(self, attr: str) -> None:
+        """Sorts matches by @attr. If matches aren't sorted, sorts ascending first, otherwise descending.
+        The sorted matches are a new DataFrame, self.matches may be self.data which must stay unsorted.
+        Descending order is the ascending order reversed, so it doesn't need a new sort.
+        When nothing is filtered, the sort order of self.data is computed once and kept in self.sort_orders,
+        so sorting back and forth between size and name doesn't sort again until the data changes."""
+
+        if attr not in ("size", "name"):
+            return
+
+        if self.sorted == f"{attr}/asc":
+            self.matches = self.matches.iloc[::-1]
+            self.sorted = f"{attr}/desc"
+            return
+
+        if self.filtered:
+            self.matches = self.matches.iloc[self.sort_order(self.matches, attr)]
+        else:
+            if attr not in self.sort_orders:
+                self.sort_orders[attr] = self.sort_order(self.data, attr)
+            self.matches = self.data.iloc[self.sort_orders[attr]]
+        self.sorted = f"{attr}/asc"
 
 
     def plot_data(self):
@@ -369,32 +607,20 @@ class Database:
         x_axis = ["0b - 0.5Kb", "0.5Kb - 1Kb",
                 "1Kb - 0.5Mb", "0.5Mb - 1Mb",
                 "1Mb - 0.5Gb", "0.5Gb - 1Gb", ">1Gb"]
-        y_axis = [0 for _ in range(7)] # Filled later
 
-        # The 6 bytesize filters
+        # The 6 bytesize filters, the upper bounds of the first 6 bars
         KB = 1024
         MB = 1024 ** 2
         GB = 1024 ** 3
         half_KB = KB // 2
         half_MB = MB // 2
         half_GB = GB // 2
+        bins = np.array([half_KB, KB, half_MB, MB, half_GB, GB], dtype=np.int64)
 
-        bytesizes = self.data["bytes"]
-        for bytesize in bytesizes:
-            if bytesize < half_KB:
-                y_axis[0] += 1
-            elif bytesize < KB:
-                y_axis[1] += 1
-            elif bytesize < half_MB:
-                y_axis[2] += 1
-            elif bytesize < MB:
-                y_axis[3] += 1
-            elif bytesize < half_GB:
-                y_axis[4] += 1
-            elif bytesize < GB:
-                y_axis[5] += 1
-            else:
-                y_axis[6] += 1
+        # Each bytesize is assigned to its' bar with a binary search over the filters, then the bars are counted
+        # Both run over the whole int64 column at once, instead of an if/elif chain per file
+        bar_indexes = np.searchsorted(bins, self.data["bytes"].to_numpy(), side="right")
+        y_axis = np.bincount(bar_indexes, minlength=len(x_axis)).tolist()
         
         
         plt.grid(which="major", axis="y", linestyle=":", zorder=0)
@@ -1,5 +1,4 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-import pandas as pd
 import subprocess
 import webbrowser
 import sys
@@ -192,6 +191,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.action_xlsx.setText("Excel File")
         self.action_xlsx.triggered.connect(lambda: self.database.export_as("excel"))
         
+        self.action_parquet = QtWidgets.QAction(self)
+        self.action_parquet.setText("Parquet File")
+        self.action_parquet.triggered.connect(lambda: self.database.export_as("parquet"))
+        
         self.action_csv = QtWidgets.QAction(self)
         self.action_csv.setText("CSV File")
         self.action_csv.triggered.connect(lambda: self.database.export_as("csv"))
@@ -260,6 +263,9 @@ class MainWindow(QtWidgets.QMainWindow):
         # Adding exporting categories to Export As
         self.menuExport_As.addAction(self.action_database)
         self.menuExport_As.addAction(self.action_xlsx)
+        if self.database.parquet_engine:
+            # Only offered when pyarrow or fastparquet is installed
+            self.menuExport_As.addAction(self.action_parquet)
         self.menuExport_As.addAction(self.action_csv)
         self.menuExport_As.addAction(self.action_json)
         self.menuExport_As.addAction(self.action_html)
@@ -342,7 +348,7 @@ class MainWindow(QtWidgets.QMainWindow):
         location = self.database.metadata["location"]
         # The following line ensures that double clicking will work whether the filepath is expanded or not
         _delimiter = "~" if "~" in item_selected else location
-        filepath = location + item_selected.split(_delimiter)[-1]
+        filepath = location + item_selected.partition(_delimiter)[2] # The path may contain "~" too, split only once
         parent_directory = filepath.rstrip(filepath.split(os.sep)[-1])
 
         if os.path.exists(parent_directory):
@@ -377,8 +383,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.search_info.clear()
 
         # Get the data from the database
-        _data, size = self.database.get_data()
-        data = pd.DataFrame(_data)
+        data, size = self.database.get_data()
 
         # This boolean function determines whether search info must be displayed
         # if the matches are the same as the data, this means no search occured, so no reason to display info
@@ -386,11 +391,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self.search_info.setText(f"{data.shape[0]:,} files ({size})")
 
 
-        length = data.shape[0]
-        stop = length if length < self.limit else self.limit
-            
-        for i in range(stop):
-            self.screen.addItem(f"""{f'{data.iloc[i]["size"]:>10}':^31}{data.iloc[i]["path"]}""")
+        # Only the rows displayed are formatted, the columns are read once and all rows are added in one call
+        shown = data.iloc[:self.limit]
+        sizes = self.database.format_bytes_array(shown["bytes"].to_numpy())
+        paths = shown["path"].to_numpy()
+        self.screen.addItems([f"{f'{row_size:>10}':^31}{path}" for row_size, path in zip(sizes, paths)])
 
         self.update_sort_buttons()
 